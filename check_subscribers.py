@@ -3,74 +3,189 @@
 Check subscribers from SQLite database
 """
 
-import os
+import sys
 import sqlite3
 import logging
+import atexit
+import threading
+from contextlib import closing
 from datetime import datetime
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from pathlib import Path
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "subscribers.db")
+DB_PATH = Path(__file__).resolve().parent / "subscribers.db"
+
+STATUS_ACTIVE = "✅ Active"
+STATUS_INACTIVE = "❌ Inactive"
+# Indexed by bool(active)
+_STATUS = (STATUS_INACTIVE, STATUS_ACTIVE)
+
+# Kept as module constants so the connection's statement cache reuses them
+COUNT_QUERY = (
+    "SELECT (SELECT COUNT(*) FROM subscribers),"
+    " (SELECT COUNT(*) FROM subscribers WHERE active = 1)"
+)
+# subscribed_at as epoch seconds, also for legacy local-time text rows the
+# bot has not migrated yet, so old and new rows display and sort together
+SUBSCRIBED_EPOCH = (
+    "CASE WHEN typeof(subscribers.subscribed_at) = 'text'"
+    " THEN CAST(strftime('%s', subscribers.subscribed_at, 'utc') AS INTEGER)"
+    " ELSE subscribers.subscribed_at END"
+)
+LIST_QUERY = (
+    "SELECT user_id, COALESCE(username, 'N/A') AS username,"
+    " COALESCE(first_name, 'N/A') AS first_name,"
+    " COALESCE(datetime(" + SUBSCRIBED_EPOCH + ", 'unixepoch'), subscribers.subscribed_at, 'N/A')"
+    " AS subscribed_at, active"
+    " FROM subscribers ORDER BY " + SUBSCRIBED_EPOCH + " DESC LIMIT ?"
+)
+WIDTHS_QUERY = (
+    "SELECT MAX(LENGTH(user_id)), MAX(LENGTH(username)), MAX(LENGTH(first_name)),"
+    " MAX(LENGTH(subscribed_at)) FROM (" + LIST_QUERY + ")"
+)
+# Builds the whole --format=json document inside SQLite
+JSON_QUERY = (
+    "SELECT json_object("
+    "'total', (SELECT COUNT(*) FROM subscribers),"
+    " 'active', (SELECT COUNT(*) FROM subscribers WHERE active = 1),"
+    " 'subscribers', (SELECT json_group_array(json_object("
+    "'user_id', user_id, 'username', username, 'first_name', first_name,"
+    " 'subscribed_at', COALESCE(datetime(subscribed_epoch, 'unixepoch'), subscribed_at),"
+    " 'active', json(CASE WHEN active THEN 'true' ELSE 'false' END)))"
+    " FROM (SELECT *, " + SUBSCRIBED_EPOCH + " AS subscribed_epoch"
+    " FROM subscribers ORDER BY subscribed_epoch DESC LIMIT ?)))"
+)
+
+# Rows are written to stdout in batches of this size
+OUTPUT_BATCH_SIZE = 256
 
-def check_subscribers():
-    """Check subscribers from SQLite database."""
+# Shared connection, opened lazily and reused across calls
+_conn = None
+_conn_lock = threading.Lock()
+
+def _get_conn():
+    """Return the cached SQLite connection, opening it on first use."""
+    global _conn
+    with _conn_lock:
+        if _conn is None:
+            # Read-only: this script never writes, so skip writer setup
+            _conn = sqlite3.connect(
+                f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False,
+                cached_statements=256, isolation_level=None  # autocommit, no implicit BEGIN
+            )
+            _conn.executescript(
+                "PRAGMA cache_size=-64000;"
+                "PRAGMA temp_store=MEMORY;"
+                "PRAGMA mmap_size=268435456;"
+            )
+        return _conn
+
+@atexit.register
+def _close_conn():
+    """Close the shared connection when the process exits."""
+    global _conn
+    with _conn_lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+def check_subscribers(limit=50):
+    """Check subscribers from SQLite database, listing the latest `limit` of them."""
     
     print("="*60)
     print("SUBSCRIBER STATUS CHECK")
     print("="*60)
     
-    if not os.path.exists(DB_PATH):
+    # Only stat the file before the shared connection has been opened
+    if _conn is None and not DB_PATH.is_file():
         print(f"❌ Database not found: {DB_PATH}")
         return
         
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with closing(_get_conn().cursor()) as cursor:
+            # Count in SQL rather than filtering rows in Python
+            # (the active count matches the idx_subscribers_active partial index)
+            try:
+                cursor.execute(COUNT_QUERY)
+            except sqlite3.OperationalError as e:
+                if "no such table" not in str(e):
+                    raise
+                print("❌ No subscribers table found in the database")
+                return
+            total, active_count = cursor.fetchone()
         
-        # Check if subscribers table exists
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='subscribers'")
-        if not cursor.fetchone():
-            print("❌ No subscribers table found in the database")
-            return
+            if not total:
+                print("❌ No subscribers found in the database")
+                return
             
-        # Get all subscribers
-        cursor.execute("SELECT user_id, username, first_name, subscribed_at, active FROM subscribers")
-        subscribers = cursor.fetchall()
+            print(f"✅ SQLite Database: {active_count} active subscribers out of {total} total")
+            if limit is not None and limit < total:
+                print(f"… (showing latest {limit} of {total})")
+            # SQLite treats a negative LIMIT as no limit
+            params = (-1 if limit is None else limit,)
         
-        if not subscribers:
-            print("❌ No subscribers found in the database")
-            return
-            
-        active_subscribers = [s for s in subscribers if s[4]]  # active is the 5th column
-        print(f"✅ SQLite Database: {len(active_subscribers)} active subscribers out of {len(subscribers)} total")
+            # Size each column to its widest value, measured in SQL so the
+            # listing below can still be streamed
+            headers = ("USER ID", "USERNAME", "FIRST NAME", "SUBSCRIPTION DATE", "STATUS")
+            cursor.execute(WIDTHS_QUERY, params)
+            w_id, w_user, w_first, w_date = (
+                max(len(header), width or 0)
+                for header, width in zip(headers, cursor.fetchone())
+            )
+            header_line = f"{headers[0]:<{w_id}} {headers[1]:<{w_user}} {headers[2]:<{w_first}} {headers[3]:<{w_date}} {headers[4]}"
+            w_status = max(len(headers[4]), len(STATUS_ACTIVE), len(STATUS_INACTIVE))
+            print("\n" + header_line)
+            print("-" * (w_id + w_user + w_first + w_date + w_status + 4))
         
-        print("\n{:<15} {:<20} {:<20} {:<25} {:<10}".format(
-            "USER ID", "USERNAME", "FIRST NAME", "SUBSCRIPTION DATE", "STATUS"
-        ))
-        print("-" * 80)
-        
-        for user_id, username, first_name, subscribed_at, active in subscribers:
-            status = "✅ Active" if active else "❌ Inactive"
-            print("{:<15} {:<20} {:<20} {:<25} {:<10}".format(
-                user_id, 
-                username or "N/A", 
-                first_name or "N/A", 
-                subscribed_at or "N/A", 
-                status
-            ))
+            # Stream rows straight off the cursor instead of materializing them,
+            # writing each batch of lines to stdout in one call
+            cursor.arraysize = OUTPUT_BATCH_SIZE
+            lines = []
+            status_tbl = _STATUS
+            for user_id, username, first_name, subscribed_at, active in cursor.execute(LIST_QUERY, params):
+                status = status_tbl[bool(active)]
+                lines.append(f"{user_id:<{w_id}} {username:<{w_user}} {first_name:<{w_first}} {subscribed_at:<{w_date}} {status}")
+                if len(lines) >= OUTPUT_BATCH_SIZE:
+                    sys.stdout.write("\n".join(lines) + "\n")
+                    lines.clear()
+            if lines:
+                sys.stdout.write("\n".join(lines) + "\n")
     except sqlite3.Error as e:
         print(f"❌ SQLite error: {e}")
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
     
     print("="*60)
 
+def dump_subscribers_json(limit=50):
+    """Write subscriber counts and the latest `limit` subscribers to stdout as JSON.
+
+    Returns a process exit code.
+    """
+    if _conn is None and not DB_PATH.is_file():
+        print(f"Database not found: {DB_PATH}", file=sys.stderr)
+        return 1
+    try:
+        with closing(_get_conn().cursor()) as cursor:
+            cursor.execute(JSON_QUERY, (-1 if limit is None else limit,))
+            sys.stdout.write(cursor.fetchone()[0] + "\n")
+    except sqlite3.Error as e:
+        print(f"SQLite error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
 if __name__ == "__main__":
-    check_subscribers() 
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check subscribers from SQLite database')
+    parser.add_argument('--format', choices=('human', 'json'), default='human',
+                        help='Output format (json is meant for scripts and health probes)')
+    parser.add_argument('--limit', type=int, default=50,
+                        help='Number of most recent subscribers to list (negative for all)')
+    args = parser.parse_args()
+    limit = None if args.limit < 0 else args.limit
+
+    if args.format == 'json':
+        sys.exit(dump_subscribers_json(limit))
+    check_subscribers(limit) 
\ No newline at end of file
@@ -1,34 +1,74 @@
 import os
-from dotenv import load_dotenv
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Bot configuration, read from the environment once per process."""
+
+    # Bot configuration
+    BOT_TOKEN: Optional[str]
+
+    # Telethon configuration
+    API_ID: Optional[str]
+    API_HASH: Optional[str]
+    PHONE: Optional[str]
+    SESSION_STRING: Optional[str]
+    BOT_SESSION_STRING: Optional[str]
+
+    # Channel to monitor
+    TARGET_CHANNEL: str
+
+    # AI API Keys
+    OPENAI_API_KEY: Optional[str]
+    DEEPSEEK_API_KEY: Optional[str]
 
-# Load environment variables
-load_dotenv()
+    # MongoDB
+    MONGODB_URI: str
 
-# Bot configuration
-BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+    # Summarization interval in minutes
+    SUMMARY_INTERVAL: int
 
-# Telethon configuration
-API_ID = os.getenv('TELEGRAM_API_ID')
-API_HASH = os.getenv('TELEGRAM_API_HASH')
-PHONE = os.getenv('TELEGRAM_PHONE')
-SESSION_STRING = os.getenv('TELETHON_SESSION_STRING')
+    # Testing interval in minutes (for development)
+    TESTING_INTERVAL: int
 
-# Channel to monitor
-TARGET_CHANNEL = os.getenv('TARGET_CHANNEL', 'marketfeed')
+    # Channel the bot publishes summaries to instead of messaging each
+    # subscriber, and the invite link new subscribers are given for it
+    SUMMARY_CHANNEL: Optional[str]
+    SUMMARY_CHANNEL_INVITE: Optional[str]
 
-# AI API Keys
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
+    # Drop duplicate channel messages before summarizing
+    DEDUP_MESSAGES: bool
 
-# MongoDB
-MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/telegrambot')
 
-# Summarization interval in minutes
-SUMMARY_INTERVAL = int(os.getenv('SUMMARY_INTERVAL', 300))
+@lru_cache(maxsize=1)
+def settings() -> Settings:
+    """Load the .env file and return the shared Settings instance."""
+    load_dotenv()
+    env = os.environ
+    return Settings(
+        BOT_TOKEN=env.get('TELEGRAM_BOT_TOKEN'),
+        API_ID=env.get('TELEGRAM_API_ID'),
+        API_HASH=env.get('TELEGRAM_API_HASH'),
+        PHONE=env.get('TELEGRAM_PHONE'),
+        SESSION_STRING=env.get('TELETHON_SESSION_STRING'),
+        BOT_SESSION_STRING=env.get('TELETHON_BOT_SESSION_STRING'),
+        TARGET_CHANNEL=env.get('TARGET_CHANNEL', 'marketfeed'),
+        OPENAI_API_KEY=env.get('OPENAI_API_KEY'),
+        DEEPSEEK_API_KEY=env.get('DEEPSEEK_API_KEY'),
+        MONGODB_URI=env.get('MONGODB_URI', 'mongodb://localhost:27017/telegrambot'),
+        SUMMARY_INTERVAL=int(env.get('SUMMARY_INTERVAL', 300)),
+        TESTING_INTERVAL=int(env.get('TESTING_INTERVAL', 5)),
+        SUMMARY_CHANNEL=env.get('SUMMARY_CHANNEL'),
+        SUMMARY_CHANNEL_INVITE=env.get('SUMMARY_CHANNEL_INVITE'),
+        DEDUP_MESSAGES=env.get('DEDUP_MESSAGES', 'true').lower() not in ('0', 'false', 'no'),
+    )
 
-# Testing interval in minutes (for development)
-TESTING_INTERVAL = int(os.getenv('TESTING_INTERVAL', 5))
 
-# Base directory
-BASE_DIR = Path(__file__).resolve().parent.parent 
\ No newline at end of file
+# Base directory, exported so child processes can skip the resolve()
+BASE_DIR = Path(os.environ.get('TELENEWSBOT_BASE_DIR') or Path(__file__).resolve().parent.parent)
+os.environ.setdefault('TELENEWSBOT_BASE_DIR', str(BASE_DIR))
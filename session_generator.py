@@ -9,40 +9,30 @@ Usage:
     python session_generator.py
 """
 
-import os
+import sys
 import getpass
-from telethon.sync import TelegramClient
-from telethon.sessions import StringSession
-from dotenv import load_dotenv
-
-# Load environment variables if available
-load_dotenv()
 
 def main():
+    # Imported here so that --help doesn't pay for loading Telethon or .env
+    from telethon.sync import TelegramClient
+    from telethon.sessions import StringSession
+    from config.settings import settings
+
     print("=== Telegram Session String Generator ===")
     
-    # Get API credentials
-    api_id = os.getenv('TELEGRAM_API_ID')
-    api_hash = os.getenv('TELEGRAM_API_HASH')
-    phone = os.getenv('TELEGRAM_PHONE')
-    
-    # If not in .env file, prompt for them
-    if not api_id:
-        api_id = input("Enter your API ID (from https://my.telegram.org/apps): ")
-    if not api_hash:
-        api_hash = input("Enter your API hash: ")
-    if not phone:
-        phone = input("Enter your phone number (with country code, e.g. +1234567890): ")
+    # Get API credentials from .env, prompting for any that are missing
+    cfg = settings()
+    api_id = cfg.API_ID or input("Enter your API ID (from https://my.telegram.org/apps): ")
+    api_hash = cfg.API_HASH or input("Enter your API hash: ")
+    phone = cfg.PHONE or input("Enter your phone number (with country code, e.g. +1234567890): ")
 
-    # Create client and connect
+    # Create client; entering the context manager already connects it
+    print("\nConnecting to Telegram...")
     with TelegramClient(StringSession(), api_id, api_hash) as client:
-        print("\nConnecting to Telegram...")
-        client.connect()
-        
-        # Send code request
+        # Only go through the code flow if the client isn't authorized yet
         if not client.is_user_authorized():
             client.send_code_request(phone)
-            code = input("Enter the code you received: ")
+            code = getpass.getpass("Enter the code you received: ")
             client.sign_in(phone, code)
             
             # In some cases, 2FA might be enabled
@@ -62,4 +52,7 @@ def main():
         print("\nNEVER share this string with anyone! It provides full access to your Telegram account.")
 
 if __name__ == "__main__":
+    if "-h" in sys.argv[1:] or "--help" in sys.argv[1:]:
+        print(__doc__.strip())
+        sys.exit(0)
     main() 
\ No newline at end of file
@@ -11,17 +11,22 @@ It doesn't use python-telegram-bot to avoid compatibility issues.
 """
 
 import asyncio
-import os
+import hashlib
 import json
 import logging
-from openai import OpenAI
+import httpx
+from collections import Counter, defaultdict, deque
+from openai import AsyncOpenAI
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
+from functools import lru_cache
 from telethon.sync import TelegramClient
 from telethon.sessions import StringSession
 from telethon import events
 from telethon.tl.types import User, InputPeerUser
+from telethon.tl.functions.channels import GetParticipantRequest, JoinChannelRequest
+from telethon.errors import UserNotParticipantError
 from subscriber_db_sqlite import SubscriberDB
+from config.settings import settings
 
 # Add timezone support
 try:
@@ -31,6 +36,19 @@ except ImportError:
     import pytz
     SGT = pytz.timezone("Asia/Singapore")
 
+# Use orjson's faster parser when it's installed
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+# tiktoken lets the news text be truncated by tokens rather than characters
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
 # Set up logging
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
@@ -38,16 +56,279 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Load environment variables
-load_dotenv()
-API_ID = os.getenv('TELEGRAM_API_ID')
-API_HASH = os.getenv('TELEGRAM_API_HASH')
-SESSION_STRING = os.getenv('TELETHON_SESSION_STRING')
-BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-TARGET_CHANNEL = os.getenv('TARGET_CHANNEL', 'marketfeed')
+_settings = settings()
+API_ID = _settings.API_ID
+API_HASH = _settings.API_HASH
+SESSION_STRING = _settings.SESSION_STRING
+BOT_SESSION_STRING = _settings.BOT_SESSION_STRING
+BOT_TOKEN = _settings.BOT_TOKEN
+OPENAI_API_KEY = _settings.OPENAI_API_KEY
+TARGET_CHANNEL = _settings.TARGET_CHANNEL
+DEDUP_MESSAGES = _settings.DEDUP_MESSAGES
+SUMMARY_CHANNEL_INVITE = _settings.SUMMARY_CHANNEL_INVITE
+# Channel ids are numeric, usernames are passed through as-is
+SUMMARY_CHANNEL = _settings.SUMMARY_CHANNEL
+if SUMMARY_CHANNEL and SUMMARY_CHANNEL.lstrip('-').isdigit():
+    SUMMARY_CHANNEL = int(SUMMARY_CHANNEL)
+
+# Configure OpenAI with one long-lived HTTP/2 connection pool, reused by every
+# call; rate limits (429) and transient errors are retried with backoff by the client
+client = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    http_client=httpx.AsyncClient(
+        http2=True, limits=httpx.Limits(max_keepalive_connections=20)
+    ),
+    max_retries=5,
+)
+
+# Maximum number of summary messages sent per second during a broadcast
+BROADCAST_CONCURRENCY = 25
+# Maximum number of channel messages buffered between summaries
+MESSAGE_BUFFER_SIZE = 2000
+
+# OpenAI model used for summaries
+SUMMARY_MODEL = "gpt-4o-mini"
 
-# Configure OpenAI
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Maximum tokens in a generated summary
+SUMMARY_MAX_TOKENS = 700
+
+# Context window of SUMMARY_MODEL
+MODEL_CONTEXT_TOKENS = 128000
+
+# How long a summary is reused for an identical batch of news
+SUMMARY_CACHE_TTL = timedelta(hours=24)
+
+# Static analyst instructions, sent first and byte-for-byte identical on
+# every call so OpenAI's automatic prompt caching can reuse the prefix.
+# Never interpolate anything into it; dynamic text goes in the user message.
+SYSTEM_PROMPT = """
+You are an expert financial analyst specializing in market impact analysis. Your task is to analyze financial news updates and provide detailed insights on potentially impacted stocks and market sectors.
+
+For each news item, you should:
+1. Identify specific stock tickers that will be directly impacted
+2. Explain WHY each stock will be impacted (positive or negative)
+3. Assess the confidence level of your prediction
+4. Identify broader market sectors that may be affected
+5. Provide actionable insights for investors
+
+When analyzing stocks, consider:
+- Direct mentions of companies in the news
+- Companies in related industries or supply chains
+- Competitors that might benefit or suffer
+- Regulatory impacts on specific sectors
+- Market sentiment shifts that could affect similar companies
+
+Format your response as a valid JSON object with the following structure exactly:
+{
+    "summary": "Comprehensive 3-4 sentence summary of key market developments and their implications",
+    "potentially_impacted_stocks": [
+        {
+            "ticker": "TICKER1",
+            "company_name": "Full Company Name",
+            "impact_type": "positive/negative/neutral",
+            "impact_reason": "Detailed explanation of why this stock will be impacted",
+            "confidence_level": "high/medium/low",
+            "expected_magnitude": "significant/moderate/minimal"
+        }
+    ],
+    "market_sectors": [
+        {
+            "sector_name": "Sector Name",
+            "impact_type": "positive/negative/neutral",
+            "impact_reason": "Explanation of sector-wide impact",
+            "key_companies": ["TICKER1", "TICKER2"]
+        }
+    ],
+    "sentiment": "bullish/bearish/neutral",
+    "key_points": [
+        "Point 1 with specific details",
+        "Point 2 with specific details", 
+        "Point 3 with specific details"
+    ],
+    "market_implications": "2-3 sentences on broader market implications and potential trading opportunities"
+}
+
+Make sure your response can be parsed as valid JSON. Be specific and detailed in your analysis.
+"""
+
+# JSON schema the summary response is constrained to (OpenAI structured outputs)
+IMPACT_TYPES = ["positive", "negative", "neutral"]
+SUMMARY_SCHEMA = {
+    "name": "financial_news_summary",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "summary": {"type": "string"},
+            "potentially_impacted_stocks": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "ticker": {"type": "string"},
+                        "company_name": {"type": "string"},
+                        "impact_type": {"type": "string", "enum": IMPACT_TYPES},
+                        "impact_reason": {"type": "string"},
+                        "confidence_level": {"type": "string", "enum": ["high", "medium", "low"]},
+                        "expected_magnitude": {"type": "string", "enum": ["significant", "moderate", "minimal"]},
+                    },
+                    "required": [
+                        "ticker", "company_name", "impact_type", "impact_reason",
+                        "confidence_level", "expected_magnitude",
+                    ],
+                    "additionalProperties": False,
+                },
+            },
+            "market_sectors": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "sector_name": {"type": "string"},
+                        "impact_type": {"type": "string", "enum": IMPACT_TYPES},
+                        "impact_reason": {"type": "string"},
+                        "key_companies": {"type": "array", "items": {"type": "string"}},
+                    },
+                    "required": ["sector_name", "impact_type", "impact_reason", "key_companies"],
+                    "additionalProperties": False,
+                },
+            },
+            "sentiment": {"type": "string", "enum": ["bullish", "bearish", "neutral"]},
+            "key_points": {"type": "array", "items": {"type": "string"}},
+            "market_implications": {"type": "string"},
+        },
+        "required": [
+            "summary", "potentially_impacted_stocks", "market_sectors",
+            "sentiment", "key_points", "market_implications",
+        ],
+        "additionalProperties": False,
+    },
+}
+
+# Character limit on the news text when no tokenizer is available
+NEWS_CHAR_LIMIT = 15000
+
+@lru_cache(maxsize=1)
+def _token_encoding():
+    """Load the SUMMARY_MODEL tokenizer and the news token budget, or (None, None).
+
+    Loaded on first use because tiktoken downloads the encoding the first
+    time. The news text may use whatever part of the context window the
+    system prompt and the response (plus a little framing overhead) leave free.
+    """
+    if tiktoken is None:
+        return None, None
+    try:
+        encoding = tiktoken.encoding_for_model(SUMMARY_MODEL)
+    except Exception as e:
+        logger.warning("Could not load the %s tokenizer, truncating by characters: %s", SUMMARY_MODEL, e)
+        return None, None
+    budget = MODEL_CONTEXT_TOKENS - len(encoding.encode(SYSTEM_PROMPT)) - SUMMARY_MAX_TOKENS - 256
+    return encoding, budget
+
+def truncate_news_text(text):
+    """Trim the combined news text to fit the model context."""
+    encoding, budget = _token_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        if len(tokens) > budget:
+            logger.warning("Message text truncated to %d tokens to fit the model context", budget)
+            return encoding.decode(tokens[:budget]) + "...(truncated)"
+    elif len(text) > NEWS_CHAR_LIMIT:
+        logger.warning("Message text truncated to fit OpenAI token limits")
+        return text[:NEWS_CHAR_LIMIT] + "...(truncated)"
+    return text
+
+# Word n-gram size and Jaccard similarity above which two messages are duplicates
+SHINGLE_SIZE = 5
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Bot replies, built once; the templates are filled with str.format_map
+WELCOME_TEMPLATE = """
+👋 Welcome {first_name}! You're now subscribed to financial news summaries.
+
+The bot will send you regular summaries of financial news with:
+- Comprehensive market analysis and key developments
+- Detailed stock impact analysis with reasoning
+- Market sentiment and sector analysis
+- Confidence levels and expected impact magnitude
+- Actionable market implications
+
+Available commands:
+/test - Generate a test summary now
+/status - Check bot status
+/help - Show all commands
+/stop - Unsubscribe
+/force_update - Force an immediate update to all subscribers
+
+You will receive summaries automatically every 3 hours with detailed analysis of potentially impacted stocks and market sectors.
+"""
+
+HELP_TEXT = """
+📈 **Financial News Bot - Commands**:
+
+/start - Subscribe to financial news summaries
+/stop - Unsubscribe from updates
+/help - Show this help message
+/status - Show bot status and subscriber count
+/test - Send a test summary (for testing purposes)
+/subscribe_me - Special command to subscribe yourself
+/force_update - Force an immediate update to all subscribers
+
+This bot monitors financial news channels and provides detailed summaries every 3 hours, including:
+• Comprehensive market analysis
+• Detailed stock impact analysis with reasoning
+• Confidence levels and expected impact magnitude
+• Sector-wide implications
+• Actionable market insights
+"""
+
+STATUS_TEMPLATE = """
+🤖 **Bot Status**:
+- Active: ✅
+- Subscribers: {count}
+- Last check: {last_check}
+- Target channel: {target_channel}
+"""
+
+# Emoji markers used when formatting summaries
+IMPACT_EMOJI = {"positive": "🟢", "negative": "🔴", "neutral": "🟡"}
+CONFIDENCE_EMOJI = {"high": "🟢", "medium": "🟡", "low": "🔴"}
+
+def _shingles(text):
+    """Return the set of word n-grams in a normalized copy of text."""
+    words = text.lower().split()
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def dedupe_messages(messages):
+    """Drop repeated and near-duplicate messages, keeping the longest copy in its original position."""
+    kept = []  # (shingles, message)
+    # Shingle -> indexes into kept, so a message is only compared with the
+    # entries it shares at least one shingle with
+    index = defaultdict(set)
+    for msg in messages:
+        shingles = _shingles(msg["text"])
+        shared = Counter()
+        for shingle in shingles:
+            shared.update(index.get(shingle, ()))
+        for i in sorted(shared):
+            other, other_msg = kept[i]
+            overlap = shared[i]
+            if overlap / (len(shingles) + len(other) - overlap) >= NEAR_DUPLICATE_THRESHOLD:
+                if len(msg["text"]) > len(other_msg["text"]):
+                    for shingle in other:
+                        index[shingle].discard(i)
+                    for shingle in shingles:
+                        index[shingle].add(i)
+                    kept[i] = (shingles, msg)
+                break
+        else:
+            for shingle in shingles:
+                index[shingle].add(len(kept))
+            kept.append((shingles, msg))
+    return [msg for _, msg in kept]
 
 class FinancialNewsMonitor:
     """Monitors financial news and sends summaries to subscribers."""
@@ -66,6 +347,17 @@ class FinancialNewsMonitor:
         self.last_processed_time = datetime.now(SGT)
         self.subscriber_db = SubscriberDB()
         self.db_ready = False
+        self._last_formatted = None  # (summary, message) from _format_summary
+        # Parsed summaries keyed by a hash of the prompt: key -> (created_at, summary)
+        self._summary_cache = {}
+        # In-flight /force_update task shared by concurrent requests
+        self._pending_update = None
+        # Channel messages pushed by Telegram since the last summary
+        self._buffer = deque(maxlen=MESSAGE_BUFFER_SIZE)
+        # SUMMARY_CHANNEL membership per subscriber: user_id -> is_member; each
+        # user is looked up once, then kept current by the channel's join/leave
+        # events and reset by /start
+        self._channel_members = {}
     
     async def connect(self):
         """Connect both the user and bot clients to Telegram."""
@@ -78,10 +370,28 @@ class FinancialNewsMonitor:
             raise ConnectionError("User client authentication failed. Check session string.")
         logger.info("User client connected successfully.")
 
+        # Telegram only pushes NewMessage updates for channels the account has
+        # joined; joining one it is already in is a no-op
+        try:
+            await self.user_client(JoinChannelRequest(self.target_channel))
+        except Exception as e:
+            logger.warning("Could not join channel %s, relying on fetching its history: %s", self.target_channel, e)
+
+        @self.user_client.on(events.NewMessage(chats=self.target_channel))
+        async def collect_message(event):
+            """Buffer new channel messages for the next summary."""
+            if event.message.text:
+                self._buffer.append({
+                    "id": event.message.id,
+                    "date": event.message.date,
+                    "text": event.message.text
+                })
+
         logger.info("Connecting bot client for user interaction...")
-        # Using a file session for the bot to persist its state
+        # In-memory session so update handling never writes to a session file;
+        # without a saved string the bot simply logs in again with its token
         self.bot_client = TelegramClient(
-            'bot_session.session', int(API_ID), API_HASH
+            StringSession(BOT_SESSION_STRING or ""), int(API_ID), API_HASH
         )
         await self.bot_client.start(bot_token=BOT_TOKEN)
         logger.info("Bot client connected successfully.")
@@ -92,8 +402,11 @@ class FinancialNewsMonitor:
             self.db_ready = True
             logger.info("SQLite subscriber DB ready.")
     
-    async def fetch_recent_messages(self, hours=4):
-        """Fetch recent messages from the target channel using the user client."""
+    async def fetch_recent_messages(self, hours=4, min_id=0):
+        """Fetch recent messages from the target channel using the user client.
+
+        Only messages from the last `hours` with an id above `min_id` are returned, newest first.
+        """
         if not self.user_client:
             await self.connect()
         
@@ -107,7 +420,7 @@ class FinancialNewsMonitor:
                     return []
                 logger.info("User client reconnected successfully")
             except Exception as e:
-                logger.error(f"Failed to reconnect user client: {e}")
+                logger.error("Failed to reconnect user client: %s", e)
                 return []
         
         try:
@@ -119,22 +432,26 @@ class FinancialNewsMonitor:
                     # Try with @ prefix
                     entity = await self.user_client.get_entity(f"@{self.target_channel}")
                 except ValueError:
-                    logger.error(f"Channel '{self.target_channel}' not found")
+                    logger.error("Channel '%s' not found", self.target_channel)
                     return []
             
             # Calculate time limit
             time_limit = datetime.now(SGT) - timedelta(hours=hours)
-            logger.info(f"Fetching messages from {self.target_channel} since {time_limit.strftime('%Y-%m-%d %H:%M:%S')} (last {hours} hours)")
+            logger.info("Fetching messages from %s since %s (last %s hours)", self.target_channel, time_limit.strftime('%Y-%m-%d %H:%M:%S'), hours)
             
             # Fetch messages - increased limit for better analysis with longer intervals
             messages = []
             message_limit = 500 if hours >= 3 else 50  # More messages for longer intervals
             
+            # Telegram filters by id server-side; messages arrive newest first,
+            # so stop as soon as one falls outside the time window
             async for message in self.user_client.iter_messages(
                 entity=entity,
                 limit=message_limit,  # Increased from 50 to 500 for 3+ hour intervals
-                offset_date=time_limit
+                min_id=min_id
             ):
+                if message.date < time_limit:
+                    break
                 if not message.text:
                     continue
                 messages.append({
@@ -143,11 +460,11 @@ class FinancialNewsMonitor:
                     "text": message.text
                 })
             
-            logger.info(f"Fetched {len(messages)} messages from {self.target_channel} (limit: {message_limit}, time window: {hours} hours)")
+            logger.info("Fetched %d messages from %s (limit: %s, time window: %s hours)", len(messages), self.target_channel, message_limit, hours)
             return messages
             
         except Exception as e:
-            logger.error(f"Error fetching messages with user client: {e}")
+            logger.error("Error fetching messages with user client: %s", e)
             # If we get a connection error, try to reconnect for next time
             if "disconnected" in str(e).lower() or "connection" in str(e).lower():
                 logger.warning("Connection error detected, will try to reconnect on next attempt")
@@ -157,105 +474,85 @@ class FinancialNewsMonitor:
                     pass
             return []
     
-    def summarize(self, messages):
+    def drain_buffered_messages(self, hours, min_id=0):
+        """Return buffered messages from the last `hours` with an id above `min_id`, newest first, and clear the buffer."""
+        time_limit = datetime.now(SGT) - timedelta(hours=hours)
+        messages = [msg for msg in self._buffer if msg["date"] >= time_limit and msg["id"] > min_id]
+        self._buffer.clear()
+        messages.reverse()
+        logger.info("Drained %d buffered messages from %s (time window: %s hours)", len(messages), self.target_channel, hours)
+        return messages
+    
+    def _cache_summary(self, key, summary):
+        """Store a parsed summary, dropping entries older than SUMMARY_CACHE_TTL."""
+        now = datetime.now(SGT)
+        self._summary_cache = {
+            k: v for k, v in self._summary_cache.items() if now - v[0] < SUMMARY_CACHE_TTL
+        }
+        self._summary_cache[key] = (now, summary)
+    
+    async def summarize(self, messages):
         """Summarize messages using OpenAI."""
         if not messages:
             logger.warning("No messages to summarize")
             return None
         
+        # Drop reposts and near-identical updates so they don't cost prompt tokens
+        if DEDUP_MESSAGES:
+            # Pairwise comparison is CPU-bound, so keep it off the event loop
+            deduped = await asyncio.get_running_loop().run_in_executor(None, dedupe_messages, messages)
+            if len(deduped) < len(messages):
+                logger.info("Dropped %d duplicate messages before summarizing", len(messages) - len(deduped))
+            messages = deduped
+        
         # Compile message texts
         message_texts = [msg["text"] for msg in messages]
         combined_text = "\n\n---\n\n".join(message_texts)
         
-        # Truncate combined text if it's too long
-        if len(combined_text) > 15000:
-            combined_text = combined_text[:15000] + "...(truncated)"
-            logger.warning("Message text truncated to fit OpenAI token limits")
+        # Truncate combined text if it's too long; tokenizing a full context
+        # window (and the first tokenizer load) is too slow for the event loop
+        combined_text = await asyncio.get_running_loop().run_in_executor(None, truncate_news_text, combined_text)
         
-        prompt = """
-You are an expert financial analyst specializing in market impact analysis. Your task is to analyze financial news updates and provide detailed insights on potentially impacted stocks and market sectors.
-
-For each news item, you should:
-1. Identify specific stock tickers that will be directly impacted
-2. Explain WHY each stock will be impacted (positive or negative)
-3. Assess the confidence level of your prediction
-4. Identify broader market sectors that may be affected
-5. Provide actionable insights for investors
-
-When analyzing stocks, consider:
-- Direct mentions of companies in the news
-- Companies in related industries or supply chains
-- Competitors that might benefit or suffer
-- Regulatory impacts on specific sectors
-- Market sentiment shifts that could affect similar companies
-
-Format your response as a valid JSON object with the following structure exactly:
-{
-    "summary": "Comprehensive 3-4 sentence summary of key market developments and their implications",
-    "potentially_impacted_stocks": [
-        {
-            "ticker": "TICKER1",
-            "company_name": "Full Company Name",
-            "impact_type": "positive/negative/neutral",
-            "impact_reason": "Detailed explanation of why this stock will be impacted",
-            "confidence_level": "high/medium/low",
-            "expected_magnitude": "significant/moderate/minimal"
-        }
-    ],
-    "market_sectors": [
-        {
-            "sector_name": "Sector Name",
-            "impact_type": "positive/negative/neutral",
-            "impact_reason": "Explanation of sector-wide impact",
-            "key_companies": ["TICKER1", "TICKER2"]
-        }
-    ],
-    "sentiment": "bullish/bearish/neutral",
-    "key_points": [
-        "Point 1 with specific details",
-        "Point 2 with specific details", 
-        "Point 3 with specific details"
-    ],
-    "market_implications": "2-3 sentences on broader market implications and potential trading opportunities"
-}
-
-Make sure your response can be parsed as valid JSON. Be specific and detailed in your analysis.
-"""
+        # Reuse a recent summary of the exact same news batch instead of calling OpenAI again
+        cache_key = (hashlib.blake2b(combined_text.encode(), digest_size=16).hexdigest(), SUMMARY_MODEL)
+        cached = self._summary_cache.get(cache_key)
+        if cached and datetime.now(SGT) - cached[0] < SUMMARY_CACHE_TTL:
+            logger.info("Reusing cached summary for identical news batch")
+            # Copy so the message is re-formatted with a fresh timestamp
+            return dict(cached[1])
         
         try:
             # Using new OpenAI API format
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",  # Changed to gpt-4o-mini
+            response = await client.chat.completions.create(
+                model=SUMMARY_MODEL,
                 messages=[
-                    {"role": "system", "content": prompt},
+                    {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": f"News updates to analyze:\n{combined_text}"}
                 ],
                 temperature=0.2,
-                response_format={"type": "json_object"},
-                max_tokens=1000
+                response_format={"type": "json_schema", "json_schema": SUMMARY_SCHEMA},
+                max_tokens=SUMMARY_MAX_TOKENS
             )
             
-            result = response.choices[0].message.content
+            choice = response.choices[0]
+            # Structured outputs only guarantee a complete, schema-valid reply;
+            # a refusal or a reply cut off at max_tokens has nothing to send
+            if choice.message.refusal:
+                logger.error("OpenAI refused to summarize: %s", choice.message.refusal)
+                return None
+            if choice.finish_reason == "length":
+                logger.error("OpenAI response was cut off at %d tokens", SUMMARY_MAX_TOKENS)
+                return None
+            result = choice.message.content
             
-            try:
-                # Log the raw response for debugging
-                logger.debug(f"Raw OpenAI response: {result}")
-                parsed = json.loads(result)
-                logger.info("Successfully parsed OpenAI response as JSON")
-                return parsed
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse JSON from OpenAI response: {e}")
-                # Fallback structured data
-                return {
-                    "summary": "Summary could not be generated in the correct format. Here's the raw output: " + result[:500] + "...",
-                    "potentially_impacted_stocks": [],
-                    "market_sectors": [],
-                    "sentiment": "neutral",
-                    "key_points": ["Error: Unable to parse structured data"],
-                    "market_implications": ""
-                }
+            # Log the raw response for debugging
+            logger.debug("Raw OpenAI response (%d chars): %s", len(result), result[:512])
+            parsed = json_loads(result)
+            logger.info("Successfully parsed OpenAI response as JSON")
+            self._cache_summary(cache_key, parsed)
+            return parsed
         except Exception as e:
-            logger.error(f"Error during summarization: {str(e)}")
+            logger.error("Error during summarization: %s", e)
             return {
                 "summary": "Error generating summary",
                 "potentially_impacted_stocks": [],
@@ -265,98 +562,197 @@ Make sure your response can be parsed as valid JSON. Be specific and detailed in
                 "market_implications": ""
             }
     
-    async def send_summary_to_subscribers(self, summary):
-        """Send a summary to all subscribers."""
-        if not summary:
-            logger.warning("No summary to send")
-            return
+    def _format_summary(self, summary):
+        """Format a summary as a Markdown message, reusing the last result for the same summary."""
+        if self._last_formatted is not None and self._last_formatted[0] is summary:
+            return self._last_formatted[1]
         
-        subscribers = await self.subscriber_db.get_active_subscribers()
-        
-        if not subscribers:
-            logger.info("No subscribers to send summary to")
-            return
-        
-        # Format the message
-        message = f"""
+        parts = [f"""
 📊 **Financial News Summary**
 
 {summary['summary']}
 
 **Key Points:**
-"""
+"""]
         for point in summary['key_points'][:3]:
-            message += f"- {point}\n"
+            parts.append(f"- {point}\n")
         
-        message += f"\n**Market Sentiment:** {summary['sentiment']}\n"
+        parts.append(f"\n**Market Sentiment:** {summary['sentiment']}\n")
         
         if summary['potentially_impacted_stocks']:
-            message += "\n**📈 Potentially Impacted Stocks:**\n"
+            parts.append("\n**📈 Potentially Impacted Stocks:**\n")
             for stock in summary['potentially_impacted_stocks']:
-                impact_emoji = "🟢" if stock['impact_type'] == 'positive' else "🔴" if stock['impact_type'] == 'negative' else "🟡"
-                confidence_emoji = "🟢" if stock['confidence_level'] == 'high' else "🟡" if stock['confidence_level'] == 'medium' else "🔴"
-                message += f"{impact_emoji} **{stock['ticker']}** ({stock['company_name']})\n"
-                message += f"   • Impact: {stock['impact_type'].title()} ({stock['expected_magnitude']})\n"
-                message += f"   • Reason: {stock['impact_reason']}\n"
-                message += f"   • Confidence: {confidence_emoji} {stock['confidence_level'].title()}\n\n"
+                impact_emoji = IMPACT_EMOJI.get(stock['impact_type'], "🟡")
+                confidence_emoji = CONFIDENCE_EMOJI.get(stock['confidence_level'], "🔴")
+                parts.append(f"{impact_emoji} **{stock['ticker']}** ({stock['company_name']})\n")
+                parts.append(f"   • Impact: {stock['impact_type'].title()} ({stock['expected_magnitude']})\n")
+                parts.append(f"   • Reason: {stock['impact_reason']}\n")
+                parts.append(f"   • Confidence: {confidence_emoji} {stock['confidence_level'].title()}\n\n")
             
         if summary['market_sectors']:
-            message += "\n**🏭 Affected Sectors:**\n"
+            parts.append("\n**🏭 Affected Sectors:**\n")
             for sector in summary['market_sectors']:
-                impact_emoji = "🟢" if sector['impact_type'] == 'positive' else "🔴" if sector['impact_type'] == 'negative' else "🟡"
-                message += f"{impact_emoji} **{sector['sector_name']}** ({sector['impact_type'].title()})\n"
-                message += f"   • Impact: {sector['impact_reason']}\n"
+                impact_emoji = IMPACT_EMOJI.get(sector['impact_type'], "🟡")
+                parts.append(f"{impact_emoji} **{sector['sector_name']}** ({sector['impact_type'].title()})\n")
+                parts.append(f"   • Impact: {sector['impact_reason']}\n")
                 if sector['key_companies']:
-                    message += f"   • Key Companies: {', '.join(sector['key_companies'])}\n"
-                message += "\n"
+                    parts.append(f"   • Key Companies: {', '.join(sector['key_companies'])}\n")
+                parts.append("\n")
         
         if summary.get('market_implications'):
-            message += f"\n**💡 Market Implications:**\n{summary['market_implications']}\n"
+            parts.append(f"\n**💡 Market Implications:**\n{summary['market_implications']}\n")
+        
+        parts.append(f"\nGenerated at {datetime.now(SGT):%Y-%m-%d %H:%M:%S}")
+        
+        message = "".join(parts)
+        # Keep a reference to the summary itself so its id can't be reused
+        self._last_formatted = (summary, message)
+        return message
+    
+    async def _is_channel_member(self, user_id):
+        """Whether a subscriber has joined SUMMARY_CHANNEL, asking Telegram only for unknown users."""
+        user_id = int(user_id)
+        is_member = self._channel_members.get(user_id)
+        if is_member is not None:
+            return is_member
+        try:
+            await self.bot_client(GetParticipantRequest(SUMMARY_CHANNEL, user_id))
+            is_member = True
+        except UserNotParticipantError:
+            is_member = False
+        except Exception as e:
+            # Unknown membership: deliver by DM rather than risk skipping the
+            # user, and don't retry every broadcast; a join event or /start
+            # corrects it
+            logger.warning("Could not check channel membership of %s: %s", user_id, e)
+            is_member = False
+        self._channel_members[user_id] = is_member
+        return is_member
+    
+    async def send_summary_to_subscribers(self, summary):
+        """Send a summary to all subscribers.
+
+        Returns True if the summary was published to SUMMARY_CHANNEL.
+        """
+        if not summary:
+            logger.warning("No summary to send")
+            return False
         
-        message += f"\nGenerated at {datetime.now(SGT).strftime('%Y-%m-%d %H:%M:%S')}"
+        # Format the message
+        message = self._format_summary(summary)
         
-        # Send to all subscribers
-        logger.info(f"Sending summary to {len(subscribers)} subscribers: {subscribers}")
-        for user_id in subscribers:
+        # With a broadcast channel configured, publish once there; only
+        # subscribers who have not joined it still get a direct message
+        published = False
+        if SUMMARY_CHANNEL:
             try:
-                # Use bot_client to send messages (not user_client!)
-                logger.info(f"Sending formatted message as bot to user {user_id}")
-                result = await self.bot_client.send_message(int(user_id), message, parse_mode='md')
-                logger.info(f"Sent summary to user {user_id}, message ID: {getattr(result, 'id', 'unknown')}")
-                
-                # Sleep to avoid hitting rate limits
-                await asyncio.sleep(1)
-                
+                await self.bot_client.send_message(SUMMARY_CHANNEL, message, parse_mode='md')
+                logger.info("Published summary to channel %s", SUMMARY_CHANNEL)
+                published = True
             except Exception as e:
-                logger.error(f"Failed to send message to {user_id}: {str(e)}")
-                logger.error(f"Exception type: {type(e).__name__}")
-                # Remove this user from active subscribers to prevent future errors
+                logger.error("Failed to publish summary to channel %s, falling back to direct messages: %s", SUMMARY_CHANNEL, e)
+        
+        subscribers, count = await self.subscriber_db.get_broadcast_targets()
+        
+        if published and count:
+            membership_semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+            
+            async def check_member(user_id):
+                async with membership_semaphore:
+                    return await self._is_channel_member(user_id)
+            
+            members = await asyncio.gather(*(check_member(user_id) for user_id in subscribers))
+            subscribers = [user_id for user_id, is_member in zip(subscribers, members) if not is_member]
+            count = len(subscribers)
+        
+        if not count:
+            logger.info("No subscribers to send summary to")
+            return published
+        
+        # Send to all subscribers concurrently; each slot is held for a
+        # second after its send, capping throughput at BROADCAST_CONCURRENCY
+        # messages per second to stay under Telegram's rate limits
+        semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+        
+        async def send_one(user_id):
+            async with semaphore:
                 try:
-                    await self.subscriber_db.remove_subscriber(user_id)
-                    logger.info(f"Removed unreachable user {user_id} from active subscribers")
-                except Exception as db_error:
-                    logger.error(f"Failed to remove user {user_id} from database: {str(db_error)}")
-                continue
+                    # Use bot_client to send messages (not user_client!)
+                    logger.info("Sending formatted message as bot to user %s", user_id)
+                    result = await self.bot_client.send_message(int(user_id), message, parse_mode='md')
+                    logger.info("Sent summary to user %s, message ID: %s", user_id, getattr(result, 'id', 'unknown'))
+                except Exception as e:
+                    logger.error("Failed to send message to %s: %s", user_id, e)
+                    logger.error("Exception type: %s", type(e).__name__)
+                    failed_ids.append(user_id)
+                    return
+                # Sleep to avoid hitting rate limits
+                await asyncio.sleep(1)
+        
+        failed_ids = []
+        logger.info("Sending summary to %d subscribers: %s", count, subscribers)
+        await asyncio.gather(*(send_one(user_id) for user_id in subscribers), return_exceptions=True)
+        
+        # Remove unreachable users from active subscribers in one batch to prevent future errors
+        if failed_ids:
+            try:
+                await self.subscriber_db.remove_subscribers(failed_ids)
+                logger.info("Removed %d unreachable users from active subscribers: %s", len(failed_ids), failed_ids)
+            except Exception as db_error:
+                logger.error("Failed to remove users %s from database: %s", failed_ids, db_error)
+        
+        return published
+    
+    async def _force_update(self):
+        """Summarize the last two hours and broadcast it; returns the reply for the requester."""
+        messages = await self.fetch_recent_messages(hours=2)
+        if not messages:
+            return "No messages found to summarize."
+        summary = await self.summarize(messages)
+        if not summary:
+            return "Error generating summary."
+        await self.send_summary_to_subscribers(summary)
+        return "✅ Force update sent successfully to subscribers!"
     
     async def monitor_and_summarize(self, interval_minutes=180, test_mode=False):
         """Continuously monitor the channel and send summaries."""
-        logger.info(f"Starting to monitor channel: {self.target_channel}")
-        logger.info(f"Summary interval: {interval_minutes} minutes")
+        logger.info("Starting to monitor channel: %s", self.target_channel)
+        logger.info("Summary interval: %s minutes", interval_minutes)
         
         if test_mode:
             logger.info("Running in TEST MODE with shorter intervals")
         
         last_message_id = None
+        needs_fetch = True
         
         while True:
             try:
-                # Fetch only messages from the last interval_minutes window
-                messages = await self.fetch_recent_messages(hours=interval_minutes / 60)
+                # Fetch the last interval_minutes window at startup, and after an
+                # error or disconnect only what is newer than the last summarized
+                # message; the rest of the time new messages are pushed into the
+                # buffer by Telegram
+                if needs_fetch or not self.user_client.is_connected():
+                    # Clear first so messages pushed during the fetch are kept;
+                    # ones the fetch also returned are dropped by id on the next drain
+                    self._buffer.clear()
+                    messages = await self.fetch_recent_messages(
+                        hours=interval_minutes / 60, min_id=last_message_id or 0
+                    )
+                    needs_fetch = False
+                else:
+                    messages = self.drain_buffered_messages(
+                        hours=interval_minutes / 60, min_id=last_message_id or 0
+                    )
+                    if not messages:
+                        # Nothing pushed: updates may not be arriving, so ask Telegram
+                        messages = await self.fetch_recent_messages(
+                            hours=interval_minutes / 60, min_id=last_message_id or 0
+                        )
                 
                 if messages and (last_message_id is None or messages[0]["id"] != last_message_id):
                     if messages:
                         last_message_id = messages[0]["id"]
-                    summary = self.summarize(messages)
+                    summary = await self.summarize(messages)
                     if summary:
                         await self.send_summary_to_subscribers(summary)
                         self.last_processed_time = datetime.now(SGT)
@@ -364,11 +760,13 @@ Make sure your response can be parsed as valid JSON. Be specific and detailed in
                 else:
                     logger.info("No new messages to summarize or same as last batch")
                     
-                logger.info(f"Sleeping for {interval_minutes} minutes until next check")
+                logger.info("Sleeping for %s minutes until next check", interval_minutes)
                 await asyncio.sleep(interval_minutes * 60)
                 
             except Exception as e:
-                logger.error(f"Error in monitoring loop: {str(e)}")
+                logger.error("Error in monitoring loop: %s", e)
+                # Updates may have been missed, so backfill on the next cycle
+                needs_fetch = True
                 # Check if it's a connection issue
                 if "disconnected" in str(e).lower() or "connection" in str(e).lower():
                     logger.warning("Connection issue detected, will attempt reconnection on next cycle")
@@ -380,7 +778,7 @@ Make sure your response can be parsed as valid JSON. Be specific and detailed in
                         await self.connect()
                         logger.info("Successfully reconnected after connection error")
                     except Exception as reconnect_error:
-                        logger.error(f"Failed to reconnect: {str(reconnect_error)}")
+                        logger.error("Failed to reconnect: %s", reconnect_error)
                 
                 # Sleep shorter time on errors to retry sooner
                 logger.info("Sleeping 60 seconds before retry due to error")
@@ -388,7 +786,6 @@ Make sure your response can be parsed as valid JSON. Be specific and detailed in
     
     async def setup_handlers(self):
         """Set up event handlers on the bot client."""
-        @self.bot_client.on(events.NewMessage(pattern='/start'))
         async def start_command(event):
             """Handle /start command."""
             sender = await event.get_sender()
@@ -396,42 +793,25 @@ Make sure your response can be parsed as valid JSON. Be specific and detailed in
             username = sender.username
             first_name = sender.first_name
             
-            logger.info(f"Start command received from user ID: {user_id}, username: {username}")
+            logger.info("Start command received from user ID: %s, username: %s", user_id, username)
             
             # Add as subscriber
             await self.subscriber_db.add_subscriber(user_id, username, first_name)
+            # Recheck their channel membership on the next broadcast
+            self._channel_members.pop(user_id, None)
             
             # Send welcome message
-            welcome_message = f"""
-👋 Welcome {first_name}! You're now subscribed to financial news summaries.
-
-The bot will send you regular summaries of financial news with:
-- Comprehensive market analysis and key developments
-- Detailed stock impact analysis with reasoning
-- Market sentiment and sector analysis
-- Confidence levels and expected impact magnitude
-- Actionable market implications
-
-Available commands:
-/test - Generate a test summary now
-/status - Check bot status
-/help - Show all commands
-/stop - Unsubscribe
-/force_update - Force an immediate update to all subscribers
-
-You will receive summaries automatically every 3 hours with detailed analysis of potentially impacted stocks and market sectors.
-"""
-            
-            # Send welcome message
-            logger.info(f"Sending welcome message to user {user_id}")
-            await event.respond(welcome_message, parse_mode='md')
+            logger.info("Sending welcome message to user %s", user_id)
+            await event.respond(WELCOME_TEMPLATE.format_map({"first_name": first_name}), parse_mode='md')
             
             # Send a test message to verify communication
-            logger.info(f"Sending test message to verify communication with {user_id}")
+            logger.info("Sending test message to verify communication with %s", user_id)
             test_message = "This is a test message to verify I can send you direct messages. If you see this, communication is working correctly!"
             await self.bot_client.send_message(sender, test_message, parse_mode='md')
+            
+            if SUMMARY_CHANNEL and SUMMARY_CHANNEL_INVITE:
+                await event.respond(f"📢 Summaries are published in our channel, join it to receive them: {SUMMARY_CHANNEL_INVITE}")
         
-        @self.bot_client.on(events.NewMessage(pattern='/stop'))
         async def stop_command(event):
             """Handle /stop command."""
             sender = await event.get_sender()
@@ -439,59 +819,36 @@ You will receive summaries automatically every 3 hours with detailed analysis of
             await self.subscriber_db.remove_subscriber(user_id)
             await event.respond("You've been unsubscribed from financial news summaries. Use /start to subscribe again.", parse_mode='md')
         
-        @self.bot_client.on(events.NewMessage(pattern='/help'))
         async def help_command(event):
             """Handle /help command."""
-            help_text = """
-📈 **Financial News Bot - Commands**:
-
-/start - Subscribe to financial news summaries
-/stop - Unsubscribe from updates
-/help - Show this help message
-/status - Show bot status and subscriber count
-/test - Send a test summary (for testing purposes)
-/subscribe_me - Special command to subscribe yourself
-/force_update - Force an immediate update to all subscribers
-
-This bot monitors financial news channels and provides detailed summaries every 3 hours, including:
-• Comprehensive market analysis
-• Detailed stock impact analysis with reasoning
-• Confidence levels and expected impact magnitude
-• Sector-wide implications
-• Actionable market insights
-"""
-            await event.respond(help_text, parse_mode='md')
+            await event.respond(HELP_TEXT, parse_mode='md')
         
-        @self.bot_client.on(events.NewMessage(pattern='/status'))
         async def status_command(event):
             """Handle /status command."""
-            count = await self.subscriber_db.get_subscriber_count()
-            status_text = f"""
-🤖 **Bot Status**:
-- Active: ✅
-- Subscribers: {count}
-- Last check: {self.last_processed_time.strftime('%Y-%m-%d %H:%M:%S')}
-- Target channel: {self.target_channel}
-"""
+            count = await self.subscriber_db.get_subscriber_count_estimate()
+            status_text = STATUS_TEMPLATE.format_map({
+                "count": count,
+                "last_check": self.last_processed_time.strftime('%Y-%m-%d %H:%M:%S'),
+                "target_channel": self.target_channel,
+            })
             await event.respond(status_text, parse_mode='md')
         
-        @self.bot_client.on(events.NewMessage(pattern='/force_update'))
         async def force_update_command(event):
             """Force an immediate update to all subscribers."""
-            sender = await event.get_sender()
-            await event.respond("Forcing an immediate update to all subscribers...", parse_mode='md')
-            messages = await self.fetch_recent_messages(hours=2)
-            if messages:
-                summary = self.summarize(messages)
-                if summary:
-                    await self.send_summary_to_subscribers(summary)
-                    await event.respond("✅ Force update sent successfully to subscribers!", parse_mode='md')
-                else:
-                    await event.respond("Error generating summary.", parse_mode='md')
+            # Concurrent requests join the update already in flight instead of
+            # starting another summary and broadcast
+            if self._pending_update is not None:
+                await event.respond("An update is already in progress, joining it...", parse_mode='md')
+                reply = await self._pending_update
             else:
-                await event.respond("No messages found to summarize.", parse_mode='md')
+                await event.respond("Forcing an immediate update to all subscribers...", parse_mode='md')
+                self._pending_update = asyncio.create_task(self._force_update())
+                try:
+                    reply = await self._pending_update
+                finally:
+                    self._pending_update = None
+            await event.respond(reply, parse_mode='md')
         
-        @self.bot_client.on(events.NewMessage(pattern='/test'))
         async def test_command(event):
             """Handle /test command - admin only for testing."""
             sender = await event.get_sender()
@@ -499,7 +856,7 @@ This bot monitors financial news channels and provides detailed summaries every
             username = sender.username
             first_name = sender.first_name
             
-            logger.info(f"Test command received from user ID: {user_id}, username: {username}")
+            logger.info("Test command received from user ID: %s, username: %s", user_id, username)
             
             # Add yourself as a subscriber to test
             await self.subscriber_db.add_subscriber(user_id, username, first_name)
@@ -509,62 +866,28 @@ This bot monitors financial news channels and provides detailed summaries every
             # Fetch and summarize
             messages = await self.fetch_recent_messages(hours=2)
             if messages:
-                summary = self.summarize(messages)
+                summary = await self.summarize(messages)
                 if summary:
-                    # Format the message directly here instead of using send_summary_to_subscribers
-                    message = f"""
-📊 **Financial News Summary**
-
-{summary['summary']}
-
-**Key Points:**
-"""
-                    for point in summary['key_points'][:3]:
-                        message += f"- {point}\n"
-                    
-                    message += f"\n**Market Sentiment:** {summary['sentiment']}\n"
-                    
-                    if summary['potentially_impacted_stocks']:
-                        message += "\n**📈 Potentially Impacted Stocks:**\n"
-                        for stock in summary['potentially_impacted_stocks']:
-                            impact_emoji = "🟢" if stock['impact_type'] == 'positive' else "🔴" if stock['impact_type'] == 'negative' else "🟡"
-                            confidence_emoji = "🟢" if stock['confidence_level'] == 'high' else "🟡" if stock['confidence_level'] == 'medium' else "🔴"
-                            message += f"{impact_emoji} **{stock['ticker']}** ({stock['company_name']})\n"
-                            message += f"   • Impact: {stock['impact_type'].title()} ({stock['expected_magnitude']})\n"
-                            message += f"   • Reason: {stock['impact_reason']}\n"
-                            message += f"   • Confidence: {confidence_emoji} {stock['confidence_level'].title()}\n\n"
-                    
-                    if summary['market_sectors']:
-                        message += "\n**🏭 Affected Sectors:**\n"
-                        for sector in summary['market_sectors']:
-                            impact_emoji = "🟢" if sector['impact_type'] == 'positive' else "🔴" if sector['impact_type'] == 'negative' else "🟡"
-                            message += f"{impact_emoji} **{sector['sector_name']}** ({sector['impact_type'].title()})\n"
-                            message += f"   • Impact: {sector['impact_reason']}\n"
-                            if sector['key_companies']:
-                                message += f"   • Key Companies: {', '.join(sector['key_companies'])}\n"
-                            message += "\n"
-                    
-                    if summary.get('market_implications'):
-                        message += f"\n**💡 Market Implications:**\n{summary['market_implications']}\n"
-                    
-                    message += f"\nGenerated at {datetime.now(SGT).strftime('%Y-%m-%d %H:%M:%S')}"
+                    message = self._format_summary(summary)
                     
                     # Send the actual summary in the chat
-                    logger.info(f"Sending test summary response directly to the chat")
+                    logger.info("Sending test summary response directly to the chat")
                     await event.respond(message, parse_mode='md')
                     
                     # Now also demonstrate the new fallback method
-                    logger.info(f"Testing the new summary delivery fallback method")
+                    logger.info("Testing the new summary delivery fallback method")
                     await event.respond("Now testing automatic delivery method, check for another message...", parse_mode='md')
-                    await self.send_summary_to_subscribers(summary)
+                    published = await self.send_summary_to_subscribers(summary)
                     
-                    await event.respond("✅ Automatic delivery test successful! You should have received another copy.", parse_mode='md')
+                    if published and await self._is_channel_member(user_id):
+                        await event.respond("✅ Automatic delivery test successful! The other copy was published to the summary channel.", parse_mode='md')
+                    else:
+                        await event.respond("✅ Automatic delivery test successful! You should have received another copy.", parse_mode='md')
                 else:
                     await event.respond("Error generating summary.", parse_mode='md')
             else:
                 await event.respond("No messages found to summarize.", parse_mode='md')
         
-        @self.bot_client.on(events.NewMessage(pattern='/subscribe_me'))
         async def subscribe_me_command(event):
             """Special command to subscribe the sender."""
             sender = await event.get_sender()
@@ -574,6 +897,39 @@ This bot monitors financial news channels and provides detailed summaries every
             await self.subscriber_db.add_subscriber(user_id, username, first_name)
             
             await event.respond(f"👋 Welcome {first_name}! You're now subscribed to financial news summaries.", parse_mode='md')
+        
+        commands = {
+            '/start': start_command,
+            '/stop': stop_command,
+            '/help': help_command,
+            '/status': status_command,
+            '/force_update': force_update_command,
+            '/test': test_command,
+            '/subscribe_me': subscribe_me_command,
+        }
+        
+        if SUMMARY_CHANNEL:
+            @self.bot_client.on(events.ChatAction(chats=SUMMARY_CHANNEL))
+            async def track_channel_membership(event):
+                """Keep the membership cache current as users join or leave SUMMARY_CHANNEL."""
+                if event.user_joined or event.user_added:
+                    is_member = True
+                elif event.user_left or event.user_kicked:
+                    is_member = False
+                else:
+                    return
+                for user_id in event.user_ids:
+                    self._channel_members[user_id] = is_member
+        
+        # One handler for all commands: a dict lookup on the first word instead
+        # of matching every message against a pattern per command
+        @self.bot_client.on(events.NewMessage(func=lambda e: e.raw_text.startswith('/')))
+        async def dispatch_command(event):
+            """Route a command message to its handler."""
+            command = event.raw_text.split(maxsplit=1)[0].split('@', 1)[0]
+            handler = commands.get(command)
+            if handler:
+                await handler(event)
     
     async def run(self, interval_minutes=180, test_mode=False):
         """Run the monitor, with the bot client taking the lead."""
@@ -592,13 +948,14 @@ This bot monitors financial news channels and provides detailed summaries every
         )
     
     async def disconnect(self):
-        """Disconnect both clients."""
+        """Disconnect both clients and close the subscriber database."""
         if self.user_client and self.user_client.is_connected():
             await self.user_client.disconnect()
             logger.info("User client disconnected.")
         if self.bot_client and self.bot_client.is_connected():
             await self.bot_client.disconnect()
             logger.info("Bot client disconnected.")
+        await self.subscriber_db.close()
 
 async def main():
     """Main entry point."""
@@ -619,23 +976,32 @@ async def main():
     
     monitor = FinancialNewsMonitor()
     
-    if args.admin_id:
-        try:
-            admin_id = str(args.admin_id)
-            logger.info(f"Adding admin (ID: {admin_id}) as a subscriber")
-            await monitor.subscriber_db.add_subscriber(admin_id, "admin", "Admin")
-            logger.info(f"Admin added as subscriber successfully")
-        except Exception as e:
-            logger.error(f"Failed to add admin as subscriber: {str(e)}")
-    
     try:
+        # The subscriber DB is only usable once connect() has opened it
+        await monitor.connect()
+        
+        if args.admin_id:
+            try:
+                admin_id = str(args.admin_id)
+                logger.info("Adding admin (ID: %s) as a subscriber", admin_id)
+                await monitor.subscriber_db.add_subscriber(admin_id, "admin", "Admin")
+                logger.info("Admin added as subscriber successfully")
+            except Exception as e:
+                logger.error("Failed to add admin as subscriber: %s", e)
+        
         await monitor.run(interval_minutes=interval, test_mode=args.test)
     except KeyboardInterrupt:
         logger.info("Interrupted by user")
     except Exception as e:
-        logger.error(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
     finally:
         await monitor.disconnect()
 
 if __name__ == "__main__":
+    # libuv-based event loop for faster network I/O, where available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main()) 
\ No newline at end of file
@@ -1,14 +1,117 @@
+"""
+PostgreSQL subscriber storage backed by an asyncpg connection pool.
+
+Queries here are small enough that event loop overhead dominates, so the
+entry point should install uvloop before starting (simple_solution.py does
+when it is available). asyncpg's binary codecs are used throughout; do not
+add a pool setup= hook that registers text codecs.
+"""
+
+import array
 import asyncpg
 import os
 import logging
-from datetime import datetime
+import time
+from contextlib import asynccontextmanager
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+POOL_SIZE = max(4, os.cpu_count() or 1)
+# Client-side bound, in seconds, on every query so a half-open connection
+# cannot stall a broadcast
+COMMAND_TIMEOUT = 10
+# Statement timeout, in seconds, for the few operations that can run long
+LONG_STATEMENT_TIMEOUT = 60
+# Below this many estimated rows an exact COUNT over the partial index is
+# cheap, and reltuples of a young index is often still 0
+ESTIMATE_MIN_ROWS = 1000
+# Seconds a cached subscriber count is trusted, in case another process
+# changes the table
+COUNT_CACHE_TTL = 30
 logger = logging.getLogger(__name__)
 
+# Statements live at module level so asyncpg's per-connection statement
+# cache is keyed on the same string object every call
+_SQL_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS subscribers (
+        user_id BIGINT PRIMARY KEY,
+        username TEXT,
+        first_name TEXT,
+        subscribed_at BIGINT NOT NULL DEFAULT extract(epoch FROM now())::bigint,
+        active BOOLEAN DEFAULT TRUE
+    )
+"""
+
+_SQL_MIGRATE_SUBSCRIBED_AT = """
+    DO $$
+    BEGIN
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'subscribers'
+              AND column_name = 'subscribed_at') <> 'bigint' THEN
+            ALTER TABLE subscribers
+                ALTER COLUMN subscribed_at DROP DEFAULT,
+                ALTER COLUMN subscribed_at TYPE BIGINT USING extract(epoch FROM subscribed_at)::bigint;
+        END IF;
+    END $$
+"""
+
+_SQL_SET_SUBSCRIBED_AT_DEFAULT = """
+    ALTER TABLE subscribers
+    ALTER COLUMN subscribed_at SET DEFAULT extract(epoch FROM now())::bigint
+"""
+
+_SQL_CREATE_ACTIVE_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_subscribers_active
+    ON subscribers(user_id) WHERE active=TRUE
+"""
+
+_SQL_ADD = """
+    INSERT INTO subscribers (user_id, username, first_name)
+    VALUES ($1, $2, $3)
+    ON CONFLICT (user_id) DO UPDATE SET active=TRUE, username=$2, first_name=$3
+"""
+
+_SQL_ADD_BULK = """
+    INSERT INTO subscribers (user_id, username, first_name)
+    SELECT user_id, username, first_name
+    FROM unnest($1::bigint[], $2::text[], $3::text[]) AS t(user_id, username, first_name)
+    ON CONFLICT (user_id) DO UPDATE
+    SET active=TRUE, username=EXCLUDED.username, first_name=EXCLUDED.first_name
+"""
+
+_SQL_DELETE = """
+    DELETE FROM subscribers WHERE user_id=$1
+"""
+
+_SQL_DELETE_MANY = """
+    DELETE FROM subscribers WHERE user_id = ANY($1::bigint[])
+"""
+
+_SQL_SELECT_ACTIVE = """
+    SELECT COALESCE(array_agg(user_id), '{}'::bigint[])
+    FROM subscribers WHERE active=TRUE
+"""
+
+_SQL_COUNT = """
+    SELECT COUNT(*) AS count FROM subscribers WHERE active=TRUE
+"""
+
+_SQL_SELECT_TARGETS = """
+    SELECT COALESCE(array_agg(user_id), '{}'::bigint[]) AS ids, COUNT(*) AS count
+    FROM subscribers WHERE active=TRUE
+"""
+
+_SQL_COUNT_ESTIMATE = """
+    SELECT reltuples::bigint FROM pg_class WHERE relname='idx_subscribers_active'
+"""
+
 class SubscriberDB:
     def __init__(self):
         self.pool = None
+        # Active subscriber count, cleared whenever subscriptions change
+        self._count = None
+        self._count_at = 0.0
+        # Bumped on every write so a count read before it is never cached
+        self._generation = 0
 
     async def connect(self):
         """Connect to PostgreSQL database with error handling."""
@@ -19,9 +122,18 @@ class SubscriberDB:
             logger.info("Attempting to connect to PostgreSQL database...")
             self.pool = await asyncpg.create_pool(
                 DATABASE_URL,
-                min_size=1,
-                max_size=10,
-                command_timeout=60
+                # Open every connection up front so callers never wait on a handshake
+                min_size=POOL_SIZE,
+                max_size=POOL_SIZE,
+                # Keep idle connections through the quiet spells between broadcasts
+                max_inactive_connection_lifetime=300,
+                command_timeout=COMMAND_TIMEOUT,
+                # asyncpg prepares parameterized queries and caches them per
+                # connection; keep every SubscriberDB statement resident
+                statement_cache_size=1024,
+                max_cacheable_statement_size=16 * 1024,
+                # JIT compilation only adds startup cost to these one-row queries
+                server_settings={'jit': 'off'}
             )
             logger.info("PostgreSQL connection pool created successfully")
             await self.create_table()
@@ -30,66 +142,148 @@ class SubscriberDB:
             logger.error("Failed to connect to PostgreSQL: %s", str(e))
             raise
 
+    @asynccontextmanager
+    async def _timeout_ctx(self, seconds=LONG_STATEMENT_TIMEOUT):
+        """Acquire a connection inside a transaction with a longer statement timeout.
+
+        SET LOCAL ends with the transaction, so nothing needs resetting even if
+        the work fails; callers pass timeout=LONG_STATEMENT_TIMEOUT to their
+        queries to lift the pool's client-side COMMAND_TIMEOUT to match.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(f"SET LOCAL statement_timeout = {int(seconds * 1000)}")
+                yield conn
+
     async def create_table(self):
         """Create the subscribers table if it doesn't exist."""
-        async with self.pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS subscribers (
-                    user_id BIGINT PRIMARY KEY,
-                    username TEXT,
-                    first_name TEXT,
-                    subscribed_at TIMESTAMP,
-                    active BOOLEAN DEFAULT TRUE
-                )
-            """)
+        async with self._timeout_ctx() as conn:
+            await conn.execute(_SQL_CREATE_TABLE, timeout=LONG_STATEMENT_TIMEOUT)
+            # Older tables stored a UTC TIMESTAMP; convert them to epoch seconds
+            await conn.execute(_SQL_MIGRATE_SUBSCRIBED_AT, timeout=LONG_STATEMENT_TIMEOUT)
+            await conn.execute(_SQL_SET_SUBSCRIBED_AT_DEFAULT, timeout=LONG_STATEMENT_TIMEOUT)
+            # Partial index so active-subscriber scans never touch inactive rows
+            await conn.execute(_SQL_CREATE_ACTIVE_INDEX, timeout=LONG_STATEMENT_TIMEOUT)
 
     async def add_subscriber(self, user_id, username, first_name):
         """Add a subscriber to the database."""
         try:
             async with self.pool.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO subscribers (user_id, username, first_name, subscribed_at, active)
-                    VALUES ($1, $2, $3, $4, TRUE)
-                    ON CONFLICT (user_id) DO UPDATE SET active=TRUE, username=$2, first_name=$3
-                """, int(user_id), username, first_name, datetime.utcnow())
+                await conn.execute(_SQL_ADD, int(user_id), username, first_name)
+                self._invalidate_count()
                 logger.debug("Added/updated subscriber: %s", user_id)
-        except Exception as e:
+        except (asyncpg.PostgresError, OSError) as e:
             logger.error("Error adding subscriber %s: %s", user_id, str(e))
             raise
 
+    async def add_subscribers_bulk(self, rows):
+        """Add or reactivate many (user_id, username, first_name) rows at once."""
+        # ON CONFLICT cannot touch the same row twice in one statement, so
+        # collapse repeated user_ids first, the last row winning
+        rows = list({int(row[0]): row for row in rows}.values())
+        if not rows:
+            return
+        user_ids, usernames, first_names = zip(*rows)
+        try:
+            async with self._timeout_ctx() as conn:
+                await conn.execute(_SQL_ADD_BULK, [int(user_id) for user_id in user_ids], list(usernames),
+                                   list(first_names), timeout=LONG_STATEMENT_TIMEOUT)
+                self._invalidate_count()
+                logger.debug("Added/updated %d subscribers", len(rows))
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Error adding %d subscribers: %s", len(rows), str(e))
+            raise
+
     async def remove_subscriber(self, user_id):
-        """Remove a subscriber from active status."""
+        """Delete a subscriber from the database."""
         try:
             async with self.pool.acquire() as conn:
-                await conn.execute("""
-                    UPDATE subscribers SET active=FALSE WHERE user_id=$1
-                """, int(user_id))
-                logger.debug("Deactivated subscriber: %s", user_id)
-        except Exception as e:
+                await conn.execute(_SQL_DELETE, int(user_id))
+                self._invalidate_count()
+                logger.debug("Deleted subscriber: %s", user_id)
+        except (asyncpg.PostgresError, OSError) as e:
             logger.error("Error removing subscriber %s: %s", user_id, str(e))
             raise
 
+    async def remove_subscribers(self, user_ids):
+        """Delete several subscribers in one statement."""
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute(_SQL_DELETE_MANY, [int(user_id) for user_id in user_ids])
+                self._invalidate_count()
+                logger.debug("Deleted %d subscribers", len(user_ids))
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.error("Error removing subscribers %s: %s", user_ids, str(e))
+            raise
+
     async def get_active_subscribers(self):
-        """Get list of active subscriber IDs."""
+        """Get active subscriber IDs as a compact array('q')."""
         try:
             async with self.pool.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT user_id FROM subscribers WHERE active=TRUE
-                """)
-                return [row['user_id'] for row in rows]
-        except Exception as e:
-            logger.error("Error fetching active subscribers: %s", str(e))
-            return []
+                # Aggregate server-side: one array value instead of a Record per row
+                return array.array('q', await conn.fetchval(_SQL_SELECT_ACTIVE))
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.warning("Error fetching active subscribers: %s", str(e))
+            raise
+
+    async def get_broadcast_targets(self):
+        """Get active subscriber IDs and their count in one round trip."""
+        try:
+            generation = self._generation
+            async with self.pool.acquire() as conn:
+                row = await conn.fetchrow(_SQL_SELECT_TARGETS)
+                self._store_count(row['count'], generation)
+                return array.array('q', row['ids']), row['count']
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.warning("Error fetching broadcast targets: %s", str(e))
+            raise
 
     async def get_subscriber_count(self):
         """Get count of active subscribers."""
+        if self._count_fresh():
+            return self._count
         try:
+            generation = self._generation
             async with self.pool.acquire() as conn:
-                row = await conn.fetchrow("SELECT COUNT(*) AS count FROM subscribers WHERE active=TRUE")
-                return row['count'] if row else 0
-        except Exception as e:
-            logger.error("Error getting subscriber count: %s", str(e))
-            return 0
+                row = await conn.fetchrow(_SQL_COUNT)
+                count = row['count'] if row else 0
+                self._store_count(count, generation)
+                return count
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.warning("Error getting subscriber count: %s", str(e))
+            raise
+
+    async def get_subscriber_count_estimate(self):
+        """Get the planner's estimate of active subscribers without a scan."""
+        if self._count_fresh():
+            return self._count
+        try:
+            async with self.pool.acquire() as conn:
+                # The partial index only holds active rows, so its reltuples
+                # estimates the active count once it has been analyzed
+                estimate = await conn.fetchval(_SQL_COUNT_ESTIMATE)
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.warning("Error estimating subscriber count: %s", str(e))
+            estimate = None
+        if estimate is None or estimate < ESTIMATE_MIN_ROWS:
+            return await self.get_subscriber_count()
+        return estimate
+
+    def _invalidate_count(self):
+        """Drop the cached count after a write."""
+        self._count = None
+        self._generation += 1
+
+    def _store_count(self, count, generation):
+        """Cache count unless a write happened since its query started."""
+        if generation == self._generation:
+            self._count = count
+            self._count_at = time.monotonic()
+
+    def _count_fresh(self):
+        """Whether the cached count can be served without a query."""
+        return (self._count is not None
+                and time.monotonic() - self._count_at < COUNT_CACHE_TTL)
 
     async def close(self):
         """Close the database connection pool."""
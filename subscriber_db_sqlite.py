@@ -1,95 +1,267 @@
-import aiosqlite
+import sqlite3
+import array
+import asyncio
 import os
 import logging
-from datetime import datetime
+import queue
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Seconds the in-process active subscriber set is trusted before it is
+# reloaded, in case something other than this process edits the table
+ACTIVE_CACHE_TTL = 30
+
+# Most queued writes the worker thread will fold into a single commit
+WRITE_BATCH_SIZE = 64
+
+# Statements live at module level so sqlite3's statement cache is keyed
+# on the same string object every call
+_SQL_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS subscribers (
+        user_id INTEGER PRIMARY KEY,
+        username TEXT,
+        first_name TEXT,
+        subscribed_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+        active INTEGER DEFAULT 1
+    )
+"""
+
+_SQL_CREATE_ACTIVE_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_subscribers_active
+    ON subscribers(active) WHERE active = 1
+"""
+
+_SQL_CREATE_SUBSCRIBED_AT_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_subscribers_subscribed_at
+    ON subscribers(subscribed_at)
+"""
+
+_SQL_ADD = """
+    INSERT OR REPLACE INTO subscribers
+    (user_id, username, first_name, subscribed_at, active)
+    VALUES (?, ?, ?, CAST(strftime('%s', 'now') AS INTEGER), 1)
+"""
+
+_SQL_MIGRATE_SUBSCRIBED_AT = """
+    UPDATE subscribers SET subscribed_at = CAST(strftime('%s', subscribed_at, 'utc') AS INTEGER)
+    WHERE typeof(subscribed_at) = 'text'
+"""
+
+_SQL_DELETE = """
+    DELETE FROM subscribers WHERE user_id = ?
+"""
+
+_SQL_SELECT_ACTIVE = """
+    SELECT group_concat(user_id) FROM subscribers WHERE active = 1
+"""
+
+_SQL_COUNT = """
+    SELECT COUNT(*) FROM subscribers WHERE active = 1
+"""
+
+def _resolve(future, result, error):
+    """Complete a job's future on its event loop unless it was cancelled."""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
 class SubscriberDB:
     def __init__(self, db_path="subscribers.db"):
         self.db_path = db_path
+        self.db = None
+        self._wal_enabled = False
+        # One worker thread owns the connection and runs every statement;
+        # writes queued back to back share a single commit
+        self._jobs = queue.SimpleQueue()
+        self._worker = None
+        # Active user_ids, kept in step with our own writes between reloads
+        self._active_cache = None
+        self._cache_loaded_at = 0.0
 
     async def connect(self):
         """Connect to SQLite database with error handling."""
         try:
-            logger.info(f"Connecting to SQLite database: {self.db_path}")
-            # Test connection and create table
+            logger.info("Connecting to SQLite database: %s", self.db_path)
+            # Only the worker thread touches the connection after this
+            self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._worker = threading.Thread(target=self._worker_loop, name="subscriber-db", daemon=True)
+            self._worker.start()
+            await self._run(self._apply_pragmas)
             await self.create_table()
+            # Load the active set now so the first broadcast is served from memory
+            await self.get_active_subscribers()
             logger.info("SQLite database connected and initialized successfully")
         except Exception as e:
             logger.error("Failed to connect to SQLite: %s", str(e))
             raise
 
+    def _run(self, job, write=False):
+        """Queue job(connection) for the worker thread and return a future for its result."""
+        if self._worker is None:
+            # Nothing would ever pick the job up, so fail instead of hanging
+            raise RuntimeError("SubscriberDB is not connected; call connect() first")
+        future = asyncio.get_running_loop().create_future()
+        self._jobs.put((job, write, future))
+        return future
+
+    def _worker_loop(self):
+        """Run queued jobs until close() sends None, then close the connection."""
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                break
+            batch = [item]
+            # Fold writes that are already waiting into the same commit
+            while item[1] and len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    item = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._jobs.put(None)
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+        self.db.close()
+
+    def _run_batch(self, batch):
+        """Run a batch of jobs, commit once if any wrote, then resolve their futures."""
+        outcomes = []
+        for job, write, future in batch:
+            try:
+                outcomes.append((future, write, job(self.db), None))
+            except Exception as e:
+                outcomes.append((future, write, None, e))
+        if any(write for _, write, _, _ in outcomes):
+            try:
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                outcomes = [(future, write, result, error or (e if write else None))
+                            for future, write, result, error in outcomes]
+        for future, _, result, error in outcomes:
+            future.get_loop().call_soon_threadsafe(_resolve, future, result, error)
+
+    def _apply_pragmas(self, db):
+        """Apply the connection PRAGMAs once for the shared connection."""
+        # WAL persists in the database file, so check_subscribers and
+        # other readers no longer block the bot's writes (or vice versa)
+        if self.db_path != ":memory:" and not self._wal_enabled:
+            db.execute("PRAGMA journal_mode=WAL")
+            self._wal_enabled = True
+        # One fsync per checkpoint instead of per commit is safe under WAL
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA busy_timeout=30000")
+        db.execute("PRAGMA temp_store=MEMORY")
+
     async def create_table(self):
         """Create the subscribers table if it doesn't exist."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS subscribers (
-                    user_id INTEGER PRIMARY KEY,
-                    username TEXT,
-                    first_name TEXT,
-                    subscribed_at TIMESTAMP,
-                    active INTEGER DEFAULT 1
-                )
-            """)
-            await db.commit()
+        def create(db):
+            db.execute(_SQL_CREATE_TABLE)
+            # Partial index so active-subscriber counts never touch inactive rows
+            db.execute(_SQL_CREATE_ACTIVE_INDEX)
+            db.execute(_SQL_CREATE_SUBSCRIBED_AT_INDEX)
+            # Older rows hold local-time text from datetime.now(); 'utc' converts
+            # them from the host's zone so they land on the right epoch seconds
+            db.execute(_SQL_MIGRATE_SUBSCRIBED_AT)
+        await self._run(create, write=True)
 
     async def add_subscriber(self, user_id, username, first_name):
         """Add a subscriber to the database."""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT OR REPLACE INTO subscribers 
-                    (user_id, username, first_name, subscribed_at, active)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (user_id, username, first_name, datetime.now(), 1))
-                await db.commit()
-            logger.info(f"Added subscriber: {user_id} ({username})")
-            return True
-        except Exception as e:
-            logger.error(f"Error adding subscriber {user_id}: {str(e)}")
-            return False
+            await self._run(lambda db: db.execute(_SQL_ADD, (user_id, username, first_name)), write=True)
+            if self._active_cache is not None:
+                self._active_cache.add(int(user_id))
+            logger.info("Added subscriber: %s (%s)", user_id, username)
+        except sqlite3.Error as e:
+            logger.error("Error adding subscriber %s: %s", user_id, str(e))
+            raise
+
+    async def add_subscribers_bulk(self, rows):
+        """Add many (user_id, username, first_name) rows in a single transaction."""
+        try:
+            params = [(user_id, username, first_name) for user_id, username, first_name in rows]
+            await self._run(lambda db: db.executemany(_SQL_ADD, params), write=True)
+            if self._active_cache is not None:
+                self._active_cache.update(int(row[0]) for row in params)
+            logger.info("Added %d subscribers", len(params))
+        except sqlite3.Error as e:
+            logger.error("Error adding subscribers in bulk: %s", str(e))
+            raise
 
     async def remove_subscriber(self, user_id):
         """Remove a subscriber from the database."""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    UPDATE subscribers SET active = 0 WHERE user_id = ?
-                """, (user_id,))
-                await db.commit()
-            logger.info(f"Removed subscriber: {user_id}")
-            return True
-        except Exception as e:
-            logger.error(f"Error removing subscriber {user_id}: {str(e)}")
-            return False
+            await self._run(lambda db: db.execute(_SQL_DELETE, (user_id,)), write=True)
+            if self._active_cache is not None:
+                self._active_cache.discard(int(user_id))
+            logger.info("Removed subscriber: %s", user_id)
+        except sqlite3.Error as e:
+            logger.error("Error removing subscriber %s: %s", user_id, str(e))
+            raise
+
+    async def remove_subscribers(self, user_ids):
+        """Remove several subscribers in a single transaction."""
+        try:
+            await self._run(lambda db: db.executemany(_SQL_DELETE, [(user_id,) for user_id in user_ids]), write=True)
+            if self._active_cache is not None:
+                self._active_cache.difference_update(int(user_id) for user_id in user_ids)
+            logger.info("Removed %d subscribers", len(user_ids))
+        except sqlite3.Error as e:
+            logger.error("Error removing subscribers %s: %s", user_ids, str(e))
+            raise
 
     async def get_active_subscribers(self):
-        """Get all active subscribers."""
+        """Get all active subscriber ids as a compact array('q')."""
+        if self._cache_fresh():
+            return array.array('q', self._active_cache)
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute("""
-                    SELECT user_id FROM subscribers WHERE active = 1
-                """) as cursor:
-                    rows = await cursor.fetchall()
-                    return [row[0] for row in rows]
-        except Exception as e:
-            logger.error(f"Error getting subscribers: {str(e)}")
-            return []
+            # One comma-separated row instead of a tuple per subscriber
+            row = await self._run(lambda db: db.execute(_SQL_SELECT_ACTIVE).fetchone())
+            ids = array.array('q', map(int, row[0].split(','))) if row and row[0] else array.array('q')
+            self._active_cache = set(ids)
+            self._cache_loaded_at = time.monotonic()
+            return ids
+        except sqlite3.Error as e:
+            logger.warning("Error getting subscribers: %s", str(e))
+            raise
+
+    async def get_broadcast_targets(self):
+        """Get the active subscriber ids together with their count."""
+        ids = await self.get_active_subscribers()
+        return ids, len(ids)
 
     async def get_subscriber_count(self):
         """Get the number of active subscribers."""
+        if self._cache_fresh():
+            return len(self._active_cache)
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute("""
-                    SELECT COUNT(*) FROM subscribers WHERE active = 1
-                """) as cursor:
-                    row = await cursor.fetchone()
-                    return row[0] if row else 0
-        except Exception as e:
-            logger.error(f"Error getting subscriber count: {str(e)}")
-            return 0
+            row = await self._run(lambda db: db.execute(_SQL_COUNT).fetchone())
+            return row[0] if row else 0
+        except sqlite3.Error as e:
+            logger.warning("Error getting subscriber count: %s", str(e))
+            raise
+
+    async def get_subscriber_count_estimate(self):
+        """Get the number of active subscribers; exact, as nothing keeps sqlite_stat1 current."""
+        # Served from the in-process set while it is fresh, else one COUNT
+        return await self.get_subscriber_count()
+
+    def _cache_fresh(self):
+        """Whether the active subscriber set can be served without a query."""
+        return (self._active_cache is not None
+                and time.monotonic() - self._cache_loaded_at < ACTIVE_CACHE_TTL)
 
     async def close(self):
-        """Close database connection (SQLite doesn't need explicit closing)."""
-        logger.info("SQLite database connection closed")
+        """Stop the worker thread, which closes the shared connection."""
+        if self._worker:
+            self._jobs.put(None)
+            await asyncio.get_running_loop().run_in_executor(None, self._worker.join)
+            self._worker = None
+            self.db = None
+            logger.info("SQLite database connection closed")